@@ -4,6 +4,738 @@ from tkinter import ttk, filedialog, messagebox
 import os
 import pandas as pd
 from datetime import datetime
+from collections import OrderedDict, deque
+import codecs
+import json
+import threading
+import time
+
+# Text/BLOB cells longer than this are truncated in the grid and loaded on demand
+CELL_PREVIEW_LIMIT = 200
+# Chunk size for incremental BLOB reads
+BLOB_CHUNK_SIZE = 64 * 1024
+# SQLite VM instructions between progress handler calls
+PROGRESS_STEP = 1000
+# Interval of the UI heartbeat used to detect frame stalls
+STALL_CHECK_MS = 50
+# Limits of the search result cache (number of results, total cached rowids)
+RESULT_CACHE_ENTRIES = 16
+RESULT_CACHE_ROWS = 1_000_000
+
+
+def format_size(size):
+    """Human readable byte size"""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def format_cell_preview(value, kind=None, size=None):
+    """Return the grid representation of a cell value"""
+    if kind is None:
+        if isinstance(value, bytes):
+            kind, size = 'blob', len(value)
+        elif isinstance(value, str):
+            kind, size = 'text', len(value)
+    if kind == 'blob':
+        return f"<BLOB {format_size(size)}>"
+    if kind == 'text' and size > CELL_PREVIEW_LIMIT:
+        return f"{value[:CELL_PREVIEW_LIMIT]}… <{size} chars>"
+    return value
+
+
+def format_preview_row(row, column_count):
+    """Turn a row produced by DatabaseEngine.build_preview_select into grid values"""
+    return [format_cell_preview(row[j * 3], row[j * 3 + 1], row[j * 3 + 2])
+            for j in range(column_count)]
+
+
+class QueryProfiler:
+    """Collects timings of database calls and UI work for the performance HUD"""
+
+    def __init__(self, max_records=1000, stall_threshold=0.1):
+        self.records = deque(maxlen=max_records)
+        self.stalls = deque(maxlen=max_records)
+        self.stall_threshold = stall_threshold
+        self.statements = 0
+        self.vm_steps = 0
+        self.started = time.perf_counter()
+
+    def reset(self):
+        self.records.clear()
+        self.stalls.clear()
+        self.statements = 0
+        self.vm_steps = 0
+
+    def attach(self, conn):
+        """Install the trace and progress callbacks on a connection"""
+        conn.set_trace_callback(self.trace)
+        conn.set_progress_handler(self.progress, PROGRESS_STEP)
+
+    def trace(self, statement):
+        # Counts every statement SQLite runs, including implicit BEGIN/COMMIT
+        self.statements += 1
+
+    def progress(self):
+        self.vm_steps += PROGRESS_STEP
+        return 0
+
+    def begin(self, sql, params):
+        record = {
+            "sql": " ".join(sql.split()),
+            "binds": len(params),
+            "start": time.perf_counter(),
+            "execute": 0.0,
+            "fetch": 0.0,
+            "rows": 0,
+            "bytes": 0,
+            "insert": 0.0,
+            "vm_steps": 0,
+            "steps_at_start": self.vm_steps,
+        }
+        self.records.append(record)
+        return record
+
+    def end_execute(self, record, duration):
+        record["execute"] += duration
+        record["vm_steps"] = self.vm_steps - record["steps_at_start"]
+
+    def add_fetch(self, record, duration, rows):
+        record["fetch"] += duration
+        record["rows"] += rows
+        record["vm_steps"] = self.vm_steps - record["steps_at_start"]
+
+    def add_blob_read(self, record, duration, size):
+        record["fetch"] += duration
+        record["bytes"] += size
+
+    def add_insert_time(self, duration):
+        """Attach Treeview insertion time to the most recent query"""
+        if self.records:
+            self.records[-1]["insert"] += duration
+
+    def add_stall(self, duration):
+        if duration >= self.stall_threshold:
+            self.stalls.append({"start": time.perf_counter() - duration, "duration": duration})
+
+    @staticmethod
+    def total_time(record):
+        return record["execute"] + record["fetch"] + record["insert"]
+
+    def last_query(self):
+        return self.records[-1] if self.records else None
+
+    def slowest(self, count=5):
+        return sorted(self.records, key=self.total_time, reverse=True)[:count]
+
+    def dump_trace(self, file_path):
+        """Write the collected records in Chrome trace event format"""
+        events = []
+        for record in self.records:
+            start_us = (record["start"] - self.started) * 1e6
+            events.append({
+                "name": record["sql"][:80],
+                "cat": "sql",
+                "ph": "X",
+                "ts": start_us,
+                "dur": (record["execute"] + record["fetch"]) * 1e6,
+                "pid": 1,
+                "tid": 1,
+                "args": {
+                    "sql": record["sql"],
+                    "binds": record["binds"],
+                    "execute_ms": record["execute"] * 1000,
+                    "fetch_ms": record["fetch"] * 1000,
+                    "rows": record["rows"],
+                    "bytes": record["bytes"],
+                    "vm_steps": record["vm_steps"],
+                },
+            })
+            if record["insert"]:
+                events.append({
+                    "name": "Treeview insert",
+                    "cat": "ui",
+                    "ph": "X",
+                    "ts": start_us + (record["execute"] + record["fetch"]) * 1e6,
+                    "dur": record["insert"] * 1e6,
+                    "pid": 1,
+                    "tid": 1,
+                    "args": {"rows": record["rows"]},
+                })
+        for stall in self.stalls:
+            events.append({
+                "name": "UI stall",
+                "cat": "ui",
+                "ph": "X",
+                "ts": (stall["start"] - self.started) * 1e6,
+                "dur": stall["duration"] * 1e6,
+                "pid": 1,
+                "tid": 2,
+            })
+
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": events,
+                       "otherData": {"statements": self.statements, "vm_steps": self.vm_steps}}, f)
+
+
+class InstrumentedCursor:
+    """Cursor wrapper that reports every statement to a QueryProfiler"""
+
+    def __init__(self, cursor, profiler):
+        self.cursor = cursor
+        self.profiler = profiler
+        self.record = None
+
+    def execute(self, sql, params=()):
+        self.record = self.profiler.begin(sql, params)
+        start = time.perf_counter()
+        try:
+            self.cursor.execute(sql, params)
+        finally:
+            self.profiler.end_execute(self.record, time.perf_counter() - start)
+        return self
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = self.cursor.fetchall()
+        self.profiler.add_fetch(self.record, time.perf_counter() - start, len(rows))
+        return rows
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = self.cursor.fetchone()
+        self.profiler.add_fetch(self.record, time.perf_counter() - start, 0 if row is None else 1)
+        return row
+
+
+class ResultCache:
+    """Size-bounded LRU of query results materialized into TEMP tables.
+
+    Entries are keyed by normalized SQL and bind parameters and hold the
+    matching rowids, so a result can be shown again or exported without
+    scanning the base table again. An entry is stale once PRAGMA
+    data_version differs from the one it was built under.
+    """
+
+    def __init__(self, cursor, max_entries=RESULT_CACHE_ENTRIES, max_rows=RESULT_CACHE_ROWS):
+        self.cursor = cursor
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.entries = OrderedDict()
+        self.total_rows = 0
+        self.counter = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(sql, params):
+        return " ".join(sql.split()), tuple(params)
+
+    def fetch(self, sql, params, data_version):
+        """Return the cache entry for a rowid query, materializing it if needed"""
+        key = self.make_key(sql, params)
+        entry = self.entries.get(key)
+        if entry is not None and entry['data_version'] == data_version:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        if entry is not None:
+            self.drop(key)
+
+        self.misses += 1
+        self.counter += 1
+        name = f"result_cache_{self.counter}"
+        self.cursor.execute(f"CREATE TEMP TABLE {name} AS {sql}", params)
+        self.cursor.execute(f"SELECT COUNT(*) FROM temp.{name}")
+        entry = {
+            'name': name,
+            'rows': self.cursor.fetchone()[0],
+            'data_version': data_version,
+        }
+        self.entries[key] = entry
+        self.total_rows += entry['rows']
+        self.evict()
+        return entry
+
+    def evict(self):
+        # Always keep the newest entry, even if it alone exceeds max_rows
+        while len(self.entries) > 1 and (len(self.entries) > self.max_entries
+                                         or self.total_rows > self.max_rows):
+            self.drop(next(iter(self.entries)))
+
+    def drop(self, key):
+        entry = self.entries.pop(key)
+        self.total_rows -= entry['rows']
+        self.cursor.execute(f"DROP TABLE IF EXISTS temp.{entry['name']}")
+
+    def clear(self):
+        for key in list(self.entries):
+            self.drop(key)
+
+
+class DatabaseEngine:
+    """Database operations behind the viewer, kept free of Tk widgets"""
+
+    def __init__(self, conn, profiler=None):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.profiler = profiler
+        if profiler is not None:
+            profiler.attach(conn)
+            self.cursor = InstrumentedCursor(self.cursor, profiler)
+        self.result_cache = ResultCache(self.cursor)
+
+    def list_tables(self):
+        self.cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
+        return [row[0] for row in self.cursor.fetchall()]
+
+    def table_info(self, table):
+        self.cursor.execute(f"PRAGMA table_info({table})")
+        return self.cursor.fetchall()
+
+    def table_columns(self, table):
+        return [col[1] for col in self.table_info(table)]
+
+    def primary_key(self, table_info):
+        """Return the first primary key column name, or None"""
+        for col in table_info:
+            if col[5]:  # Fifth element shows if column is PK
+                return col[1]
+        return None
+
+    def has_rowid(self, table):
+        """Return True if the table has a rowid (i.e. it is not WITHOUT ROWID)"""
+        try:
+            self.cursor.execute(f"SELECT rowid FROM {table} LIMIT 0")
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+    def row_key_columns(self, table):
+        """Columns that identify a row: the rowid, or the primary key of a WITHOUT ROWID table"""
+        if self.has_rowid(table):
+            return ["rowid"]
+        pk_columns = sorted((col[5], col[1]) for col in self.table_info(table) if col[5])
+        return [name for _, name in pk_columns]
+
+    def build_preview_select(self, columns, key_columns):
+        """Build a select list that truncates large TEXT and drops BLOB payloads.
+
+        Every column becomes three result columns: the (possibly truncated)
+        value, its storage class and its length. The untruncated key columns
+        go first, so full values can be fetched later.
+        """
+        parts = list(key_columns)
+        for col in columns:
+            parts.append(f"CASE WHEN typeof({col}) = 'blob' THEN NULL "
+                         f"WHEN typeof({col}) = 'text' AND length({col}) > {CELL_PREVIEW_LIMIT} "
+                         f"THEN substr({col}, 1, {CELL_PREVIEW_LIMIT}) "
+                         f"ELSE {col} END")
+            parts.append(f"typeof({col})")
+            parts.append(f"length({col})")
+        return ", ".join(parts)
+
+    def load_rows(self, table, columns, key_columns):
+        """Fetch all rows of a table through the preview projection"""
+        self.cursor.execute(f"SELECT {self.build_preview_select(columns, key_columns)} FROM {table}")
+        return self.cursor.fetchall()
+
+    def search_filter(self, columns, search_text):
+        """Return the WHERE clause and parameters matching rows where any column contains search_text"""
+        clause = " WHERE " + " OR ".join([f"{col} LIKE ?" for col in columns])
+        return clause, tuple(f"%{search_text}%" for _ in columns)
+
+    def search_rows(self, table, columns, key_columns, search_text):
+        """Fetch preview rows where any column contains search_text"""
+        clause, params = self.search_filter(columns, search_text)
+        self.cursor.execute(f"SELECT {self.build_preview_select(columns, key_columns)} FROM {table}{clause}",
+                            params)
+        return self.cursor.fetchall()
+
+    def data_version(self):
+        self.cursor.execute("PRAGMA data_version")
+        return self.cursor.fetchone()[0]
+
+    def cached_search(self, table, columns, search_text):
+        """Materialize the rowids matching search_text, reusing a cached result when valid.
+
+        Only tables with a rowid can be cached.
+        """
+        clause, params = self.search_filter(columns, search_text)
+        return self.result_cache.fetch(f"SELECT rowid AS cached_rowid FROM {table}{clause}", params,
+                                       self.data_version())
+
+    def result_filter(self, result):
+        """Return the WHERE clause and parameters selecting the rows of a cached result"""
+        return f" WHERE rowid IN (SELECT cached_rowid FROM temp.{result['name']})", ()
+
+    def result_rows(self, table, columns, result):
+        """Fetch preview rows of a cached result"""
+        clause, params = self.result_filter(result)
+        self.cursor.execute(f"SELECT {self.build_preview_select(columns, ['rowid'])} FROM {table}{clause}",
+                            params)
+        return self.cursor.fetchall()
+
+    @staticmethod
+    def key_filter(key_columns, key):
+        """Return the WHERE clause and parameters selecting the row with the given key"""
+        return " WHERE " + " AND ".join(f"{col} = ?" for col in key_columns), tuple(key)
+
+    def fetch_row(self, table, key_columns, key):
+        """Fetch the untruncated values of the row with the given key, or None if it is gone"""
+        clause, params = self.key_filter(key_columns, key)
+        self.cursor.execute(f"SELECT * FROM {table}{clause}", params)
+        row = self.cursor.fetchone()
+        return list(row) if row is not None else None
+
+    def cell_type(self, table, column, key_columns, key):
+        """Return (storage class, length) of a single cell"""
+        clause, params = self.key_filter(key_columns, key)
+        self.cursor.execute(f"SELECT typeof({column}), length({column}) FROM {table}{clause}", params)
+        return self.cursor.fetchone()
+
+    def cell_value(self, table, column, key_columns, key):
+        clause, params = self.key_filter(key_columns, key)
+        self.cursor.execute(f"SELECT {column} FROM {table}{clause}", params)
+        return self.cursor.fetchone()[0]
+
+    def read_cell_chunks(self, table, column, key_columns, key):
+        """Yield the raw bytes of a cell in BLOB_CHUNK_SIZE pieces.
+
+        Uses incremental BLOB I/O so the value is never held in memory as a
+        whole; falls back to a plain SELECT when blobopen is unavailable or
+        the table has no rowid.
+        """
+        if key_columns == ["rowid"] and hasattr(self.conn, "blobopen"):
+            rowid = key[0]
+            record = None
+            if self.profiler is not None:
+                record = self.profiler.begin(f"blobopen {table}.{column} rowid={rowid}", ())
+
+            start = time.perf_counter()
+            blob = self.conn.blobopen(table, column, rowid, readonly=True)
+            if record is not None:
+                self.profiler.end_execute(record, time.perf_counter() - start)
+
+            with blob:
+                while True:
+                    start = time.perf_counter()
+                    chunk = blob.read(BLOB_CHUNK_SIZE)
+                    if record is not None:
+                        self.profiler.add_blob_read(record, time.perf_counter() - start, len(chunk))
+                    if not chunk:
+                        break
+                    yield chunk
+            return
+
+        value = self.cell_value(table, column, key_columns, key)
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        for start in range(0, len(value), BLOB_CHUNK_SIZE):
+            yield value[start:start + BLOB_CHUNK_SIZE]
+
+    def commit(self):
+        if self.profiler is None:
+            self.conn.commit()
+            return
+
+        record = self.profiler.begin("COMMIT", ())
+        start = time.perf_counter()
+        try:
+            self.conn.commit()
+        finally:
+            self.profiler.end_execute(record, time.perf_counter() - start)
+
+    def insert_record(self, table, values):
+        placeholders = ", ".join("?" * len(values))
+        query = f"INSERT INTO {table} VALUES ({placeholders})"
+        self.cursor.execute(query, values)
+        self.commit()
+        self.result_cache.clear()
+
+    def update_record(self, table, cols, old_values, new_values):
+        table_info = self.table_info(table)
+        pk_column = self.primary_key(table_info)
+        set_clause = ", ".join(f"{col} = ?" for col in cols)
+
+        if pk_column:
+            pk_index = [col[1] for col in table_info].index(pk_column)
+            query = f"UPDATE {table} SET {set_clause} WHERE {pk_column} = ?"
+            self.cursor.execute(query, list(new_values) + [old_values[pk_index]])
+        else:
+            # If no PK, use all values for WHERE
+            where_clause = " AND ".join(f"{col} = ?" for col in cols)
+            query = f"UPDATE {table} SET {set_clause} WHERE {where_clause}"
+            self.cursor.execute(query, list(new_values) + list(old_values))
+
+        self.commit()
+        self.result_cache.clear()
+
+    def delete_record(self, table, cols, old_values):
+        table_info = self.table_info(table)
+        pk_column = self.primary_key(table_info)
+
+        if pk_column:
+            pk_index = [col[1] for col in table_info].index(pk_column)
+            query = f"DELETE FROM {table} WHERE {pk_column} = ?"
+            self.cursor.execute(query, (old_values[pk_index],))
+        else:
+            # If no PK, use all values for WHERE
+            where_clause = " AND ".join(f"{col} = ?" for col in cols)
+            query = f"DELETE FROM {table} WHERE {where_clause}"
+            self.cursor.execute(query, old_values)
+
+        self.commit()
+        self.result_cache.clear()
+
+    def describe_table(self, table):
+        """Return the table information text shown by the Table Info button"""
+        columns_info = self.table_info(table)
+
+        self.cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        row_count = self.cursor.fetchone()[0]
+
+        info_text = f"Table: {table}\n"
+        info_text += f"Record count: {row_count}\n\n"
+        info_text += "Table structure:\n"
+        info_text += "-" * 50 + "\n"
+
+        for col in columns_info:
+            col_name = col[1]
+            col_type = col[2]
+            not_null = "NOT NULL" if col[3] else "NULL"
+            pk = "PRIMARY KEY" if col[5] else ""
+            info_text += f"{col_name}: {col_type} {not_null} {pk}\n"
+
+        return info_text
+
+    def export_to_excel(self, table, file_path, row_filter=None):
+        """Write the table to an .xlsx file, returns the number of records.
+
+        row_filter is an optional (WHERE clause, parameters) pair, e.g. from result_filter.
+        """
+        # Get data from database
+        clause, params = row_filter or ("", ())
+        self.cursor.execute(f"SELECT * FROM {table}{clause}", params)
+        data = self.cursor.fetchall()
+
+        # Create DataFrame
+        df = pd.DataFrame(data, columns=self.table_columns(table))
+
+        # Export to Excel with formatting
+        with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
+            df.to_excel(writer, sheet_name=table, index=False)
+
+            # Auto-adjust column widths
+            worksheet = writer.sheets[table]
+            for column in worksheet.columns:
+                max_length = 0
+                column_letter = column[0].column_letter
+                for cell in column:
+                    try:
+                        if len(str(cell.value)) > max_length:
+                            max_length = len(str(cell.value))
+                    except:
+                        pass
+                adjusted_width = min(max_length + 2, 50)
+                worksheet.column_dimensions[column_letter].width = adjusted_width
+
+        return len(data)
+
+    def export_data(self, table, filetype, file_path, row_filter=None):
+        """Write the table as csv, txt or sql, returns the number of records.
+
+        row_filter is an optional (WHERE clause, parameters) pair, e.g. from result_filter.
+        """
+        clause, params = row_filter or ("", ())
+        self.cursor.execute(f"SELECT * FROM {table}{clause}", params)
+        rows = self.cursor.fetchall()
+
+        # Get column names
+        cols = self.table_columns(table)
+
+        if filetype == 'csv':
+            # Export to CSV
+            with open(file_path, 'w', encoding='utf-8') as f:
+                # Write headers
+                f.write(','.join(cols) + '\n')
+                # Write data
+                for row in rows:
+                    f.write(','.join(str(value).replace(',', ';') for value in row) + '\n')
+
+        elif filetype == 'txt':
+            # Export to text with formatting
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(f"Table: {table}\n")
+                f.write(f"Export date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+                f.write(f"Record count: {len(rows)}\n")
+                f.write("=" * 80 + "\n\n")
+
+                # Write headers
+                header = " | ".join(cols)
+                f.write(header + "\n")
+                f.write("-" * len(header) + "\n")
+
+                # Write data
+                for row in rows:
+                    line = " | ".join(str(value) for value in row)
+                    f.write(line + "\n")
+
+        elif filetype == 'sql':
+            # Export as SQL INSERT statements
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(f"-- SQL Export for table: {table}\n")
+                f.write(f"-- Export date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+                f.write(f"-- Record count: {len(rows)}\n\n")
+
+                for row in rows:
+                    values = []
+                    for value in row:
+                        if value is None:
+                            values.append("NULL")
+                        elif isinstance(value, (int, float)):
+                            values.append(str(value))
+                        else:
+                            # ИСПРАВЛЕННАЯ СТРОКА - используем переменную для экранирования
+                            escaped_value = str(value).replace("'", "''")
+                            values.append(f"'{escaped_value}'")
+
+                    insert_stmt = f"INSERT INTO {table} VALUES ({', '.join(values)});\n"
+                    f.write(insert_stmt)
+
+        return len(rows)
+
+
+MAINTENANCE_OPERATIONS = {
+    'stats': "Refreshing statistics",
+    'optimize': "ANALYZE + PRAGMA optimize",
+    'vacuum_into': "VACUUM INTO",
+    'checkpoint': "WAL checkpoint (TRUNCATE)",
+    'integrity': "Integrity check",
+}
+
+
+def database_stats(conn, file_path):
+    """Return size, free-list and fragmentation figures of a database"""
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    wal_path = file_path + "-wal"
+    stats = {
+        'file_size': os.path.getsize(file_path),
+        'wal_size': os.path.getsize(wal_path) if os.path.exists(wal_path) else 0,
+        'page_size': page_size,
+        'page_count': page_count,
+        'freelist_count': freelist_count,
+        'free_percent': freelist_count / page_count * 100 if page_count else 0.0,
+        'unused_percent': None,
+    }
+
+    # Unused bytes inside pages, only when SQLite is built with dbstat
+    try:
+        unused, total = conn.execute("SELECT sum(unused), sum(pgsize) FROM dbstat").fetchone()
+        if total:
+            stats['unused_percent'] = unused / total * 100
+    except sqlite3.OperationalError:
+        pass
+
+    return stats
+
+
+class MaintenanceJob:
+    """Runs one maintenance operation on its own connection in a background thread.
+
+    The UI polls steps, done, result and error; cancel() makes the progress
+    handler abort the running statement.
+    """
+
+    def __init__(self, db_path, operation, target_path=None):
+        self.db_path = db_path
+        self.operation = operation
+        self.target_path = target_path
+        self.cancelled = threading.Event()
+        self.steps = 0
+        self.started = time.perf_counter()
+        self.done = False
+        self.result = None
+        self.error = None
+        self.before = None
+        self.after = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def progress(self):
+        self.steps += PROGRESS_STEP
+        return 1 if self.cancelled.is_set() else 0
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def run(self):
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            conn.set_progress_handler(self.progress, PROGRESS_STEP)
+            self.before = database_stats(conn, self.db_path)
+
+            if self.operation == 'optimize':
+                conn.execute("ANALYZE")
+                conn.execute("PRAGMA optimize")
+                self.result = "Statistics updated"
+            elif self.operation == 'vacuum_into':
+                conn.execute("VACUUM INTO ?", (self.target_path,))
+                self.result = f"Compacted copy written to {self.target_path}"
+            elif self.operation == 'checkpoint':
+                journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+                if journal_mode.lower() != 'wal':
+                    self.result = f"Database is not in WAL mode (journal_mode={journal_mode})"
+                else:
+                    # TRUNCATE reports 0 frames once the log is reset, so count them with a PASSIVE pass first
+                    _, log_frames, checkpointed = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+                    busy = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()[0]
+                    if busy:
+                        self.result = "Checkpoint could not complete, the database is busy"
+                    else:
+                        self.result = f"Checkpointed {checkpointed} of {log_frames} WAL frames, WAL truncated"
+            elif self.operation == 'integrity':
+                problems = [row[0] for row in conn.execute("PRAGMA integrity_check(100)").fetchall()]
+                self.result = "Integrity check passed" if problems == ['ok'] else "\n".join(problems)
+            else:
+                self.result = "Statistics refreshed"
+
+            # A stats refresh ran nothing since the first measurement, so it has no "after"
+            if self.operation == 'vacuum_into':
+                target = sqlite3.connect(self.target_path)
+                try:
+                    self.after = database_stats(target, self.target_path)
+                finally:
+                    target.close()
+            elif self.operation != 'stats':
+                self.after = database_stats(conn, self.db_path)
+
+        except sqlite3.OperationalError as e:
+            if self.cancelled.is_set():
+                self.error = "Operation cancelled"
+                # Do not leave a half-written copy behind
+                if self.operation == 'vacuum_into' and self.target_path and os.path.exists(self.target_path):
+                    os.remove(self.target_path)
+            else:
+                self.error = str(e)
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            if conn is not None:
+                conn.close()
+            self.done = True
 
 
 class SQLiteViewer:
@@ -16,10 +748,18 @@ class SQLiteViewer:
         # Setup styles
         self.setup_styles()
 
-        self.conn = None
-        self.cursor = None
+        self.engine = None
         self.current_table = None
         self.db_name = None
+        self.db_path = None
+        self.table_has_rowid = False
+        self.key_columns = []
+        self.row_keys = {}
+        self.search_text = None
+        self.profiler = QueryProfiler()
+        self.hud = None
+        self.maintenance_win = None
+        self.maintenance_job = None
 
         # Create main container
         main_container = ttk.Frame(root, style="Card.TFrame")
@@ -113,6 +853,9 @@ class SQLiteViewer:
         vsb.config(command=self.tree.yview)
         hsb.config(command=self.tree.xview)
 
+        # Double-click opens the full value of a truncated cell
+        self.tree.bind("<Double-1>", self.show_cell_value)
+
         # Control buttons panel
         btn_frame = ttk.Frame(main_container, style="Card.TFrame")
         btn_frame.pack(fill="x", padx=10, pady=10)
@@ -124,7 +867,9 @@ class SQLiteViewer:
             ("❌ Delete Record", self.delete_record, "Danger.TButton"),
             ("🔄 Refresh", self.load_table, "Info.TButton"),
             ("📊 Table Info", self.show_table_info, "Primary.TButton"),
-            ("💾 Export", self.export_data_menu, "Success.TButton")
+            ("🛠 Maintenance", self.show_maintenance_panel, "Secondary.TButton"),
+            ("💾 Export", self.export_data_menu, "Success.TButton"),
+            ("⏱ Performance", self.show_performance_hud, "Tertiary.TButton")
         ]
 
         for i, (text, command, style) in enumerate(buttons):
@@ -145,6 +890,10 @@ class SQLiteViewer:
         self.tree.tag_configure('evenrow', background='#ffffff')
         self.tree.tag_configure('selected', background='#007bff', foreground='white')
 
+        # Heartbeat that detects UI frame stalls
+        self.last_tick = time.perf_counter()
+        self.root.after(STALL_CHECK_MS, self.check_frame_stall)
+
     def setup_styles(self):
         """Setup custom styles"""
         style = ttk.Style()
@@ -261,8 +1010,8 @@ class SQLiteViewer:
             return
 
         try:
-            self.conn = sqlite3.connect(file_path)
-            self.cursor = self.conn.cursor()
+            self.engine = DatabaseEngine(sqlite3.connect(file_path), self.profiler)
+            self.db_path = file_path
             self.db_name = os.path.basename(file_path)
             self.db_info_label.config(text=f"Database: {self.db_name}")
             self.load_tables()
@@ -272,8 +1021,7 @@ class SQLiteViewer:
             self.status_bar.config(text="Error opening database")
 
     def load_tables(self):
-        self.cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
-        tables = [row[0] for row in self.cursor.fetchall()]
+        tables = self.engine.list_tables()
 
         if tables:
             self.table_selector["values"] = tables
@@ -290,10 +1038,10 @@ class SQLiteViewer:
 
         self.current_table = self.table_selector.get()
         self.db_info_label.config(text=f"Database: {self.db_name} | Table: {self.current_table}")
+        self.search_text = None
 
         try:
-            self.cursor.execute(f"PRAGMA table_info({self.current_table})")
-            columns = [col[1] for col in self.cursor.fetchall()]
+            columns = self.engine.table_columns(self.current_table)
 
             # Clear current data
             for item in self.tree.get_children():
@@ -305,14 +1053,13 @@ class SQLiteViewer:
                 self.tree.heading(col, text=col)
                 self.tree.column(col, width=150, minwidth=50, stretch=True)
 
-            # Load data
-            self.cursor.execute(f"SELECT * FROM {self.current_table}")
-            rows = self.cursor.fetchall()
+            # Load data through a truncating projection
+            self.key_columns = self.engine.row_key_columns(self.current_table)
+            self.table_has_rowid = self.key_columns == ["rowid"]
+            rows = self.engine.load_rows(self.current_table, columns, self.key_columns)
 
             # Add rows with alternating colors
-            for i, row in enumerate(rows):
-                tag = 'evenrow' if i % 2 == 0 else 'oddrow'
-                self.tree.insert("", "end", values=row, tags=(tag,))
+            self.insert_preview_rows(rows, len(columns))
 
             self.status_bar.config(text=f"Table '{self.current_table}': {len(rows)} records")
 
@@ -320,6 +1067,137 @@ class SQLiteViewer:
             messagebox.showerror("Error", f"Failed to load table:\n{e}")
             self.status_bar.config(text="Error loading table")
 
+    def insert_preview_rows(self, rows, column_count):
+        """Insert rows produced by the preview projection into the tree"""
+        start = time.perf_counter()
+        # Called right after the tree is cleared, so the old keys are stale
+        self.row_keys = {}
+        key_count = len(self.key_columns)
+        for i, row in enumerate(rows):
+            key, row = tuple(row[:key_count]), row[key_count:]
+            iid = str(key[0]) if self.table_has_rowid else None
+            tag = 'evenrow' if i % 2 == 0 else 'oddrow'
+            item = self.tree.insert("", "end", iid=iid, values=format_preview_row(row, column_count), tags=(tag,))
+            self.row_keys[item] = key
+        self.profiler.add_insert_time(time.perf_counter() - start)
+
+    def fetch_full_row(self, item):
+        """Fetch the untruncated values of a tree row, or None if they cannot be loaded.
+
+        The grid only holds previews, so its values must never be used instead.
+        """
+        key = self.row_keys.get(item)
+        if key is None or not self.key_columns:
+            return None
+        return self.engine.fetch_row(self.current_table, self.key_columns, key)
+
+    def show_cell_value(self, event):
+        """Open the full value of the double-clicked cell"""
+        if not self.current_table or self.tree.identify_region(event.x, event.y) != "cell":
+            return
+
+        item = self.tree.identify_row(event.y)
+        col_index = int(self.tree.identify_column(event.x)[1:]) - 1
+        if not item or col_index < 0:
+            return
+
+        column = self.tree["columns"][col_index]
+        key = self.row_keys.get(item)
+        if key is None:
+            return
+
+        try:
+            kind, size = self.engine.cell_type(self.current_table, column, self.key_columns, key)
+            self.open_cell_viewer(key, column, kind, size)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load cell value:\n{e}")
+
+    def open_cell_viewer(self, key, column, kind, size):
+        """Show a cell value in a window with an option to save it to a file"""
+        key_columns = self.key_columns
+        key_text = ", ".join(f"{col} {value}" for col, value in zip(key_columns, key))
+        viewer = tk.Toplevel(self.root)
+        viewer.title(f"{self.current_table}.{column} ({key_text})")
+        viewer.geometry("700x500")
+        viewer.configure(bg="#f0f2f5")
+        viewer.transient(self.root)
+
+        container = ttk.Frame(viewer, style="Card.TFrame")
+        container.pack(fill="both", expand=True, padx=20, pady=20)
+
+        header = f"{column}: {kind.upper()}"
+        if kind == 'blob':
+            header += f", {format_size(size)}"
+        elif kind == 'text':
+            header += f", {size} chars"
+        ttk.Label(container,
+                  text=header,
+                  style="Label.TLabel").pack(anchor="w", padx=10, pady=5)
+
+        text_frame = ttk.Frame(container)
+        text_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        vsb = ttk.Scrollbar(text_frame, orient="vertical")
+        vsb.pack(side="right", fill="y")
+        text = tk.Text(text_frame, wrap="word", yscrollcommand=vsb.set, font=("Consolas", 10))
+        text.pack(fill="both", expand=True)
+        vsb.config(command=text.yview)
+
+        if kind == 'text':
+            # Stream the text in chunks, decoding across chunk boundaries
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            for chunk in self.engine.read_cell_chunks(self.current_table, column, key_columns, key):
+                text.insert("end", decoder.decode(chunk))
+            text.insert("end", decoder.decode(b"", final=True))
+        elif kind == 'blob':
+            # Only the first chunk is shown as a hex dump
+            chunk = next(self.engine.read_cell_chunks(self.current_table, column, key_columns, key), b"")
+            for offset in range(0, len(chunk), 16):
+                line = chunk[offset:offset + 16]
+                text.insert("end", f"{offset:08x}  {line.hex(' '):<47}  "
+                                   f"{''.join(chr(b) if 32 <= b < 127 else '.' for b in line)}\n")
+            if size > len(chunk):
+                text.insert("end", f"\n… {format_size(size - len(chunk))} more, save to file to see all\n")
+        else:
+            text.insert("end", str(self.engine.cell_value(self.current_table, column, key_columns, key)))
+        text.config(state="disabled")
+
+        btn_frame = ttk.Frame(container)
+        btn_frame.pack(pady=10)
+
+        if kind in ('text', 'blob'):
+            ttk.Button(btn_frame,
+                       text="💾 Save to File",
+                       command=lambda: self.save_cell_value(key_columns, key, column, kind),
+                       style="Success.TButton").pack(side="left", padx=5)
+
+        ttk.Button(btn_frame,
+                   text="❌ Close",
+                   command=viewer.destroy,
+                   style="Danger.TButton").pack(side="left", padx=5)
+
+    def save_cell_value(self, key_columns, key, column, kind):
+        """Stream a cell value to a file"""
+        extension = ".txt" if kind == 'text' else ".bin"
+        key_text = "_".join(str(value) for value in key)
+        file_path = filedialog.asksaveasfilename(
+            title="Save Cell Value",
+            defaultextension=extension,
+            initialfile=f"{self.current_table}_{column}_{key_text}{extension}",
+            filetypes=[("All files", "*.*")]
+        )
+        if not file_path:
+            return
+
+        try:
+            written = 0
+            with open(file_path, 'wb') as f:
+                for chunk in self.engine.read_cell_chunks(self.current_table, column, key_columns, key):
+                    f.write(chunk)
+                    written += len(chunk)
+            self.status_bar.config(text=f"Saved {format_size(written)} to {os.path.basename(file_path)}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save cell value:\n{e}")
+
     def search_records(self):
         if not self.current_table:
             messagebox.showwarning("Warning", "Select a table for search")
@@ -331,27 +1209,52 @@ class SQLiteViewer:
             return
 
         try:
-            self.cursor.execute(f"PRAGMA table_info({self.current_table})")
-            columns = [col[1] for col in self.cursor.fetchall()]
-
-            query = f"SELECT * FROM {self.current_table} WHERE " + " OR ".join([f"{col} LIKE ?" for col in columns])
-            self.cursor.execute(query, tuple(f"%{search_text}%" for _ in columns))
-            results = self.cursor.fetchall()
+            self.search_text = search_text
+            columns = list(self.tree["columns"])
+            results = self.fetch_visible_rows(columns)
 
             # Clear table
             for item in self.tree.get_children():
                 self.tree.delete(item)
 
             # Display results
-            for i, row in enumerate(results):
-                tag = 'evenrow' if i % 2 == 0 else 'oddrow'
-                self.tree.insert("", "end", values=row, tags=(tag,))
+            self.insert_preview_rows(results, len(columns))
 
             self.status_bar.config(text=f"Found {len(results)} records for: '{search_text}'")
 
         except Exception as e:
             messagebox.showerror("Error", f"Search error:\n{e}")
 
+    def active_search_result(self):
+        """Return the cached result of the current search, or None when not searching"""
+        if not self.search_text or not self.table_has_rowid:
+            return None
+        return self.engine.cached_search(self.current_table, list(self.tree["columns"]), self.search_text)
+
+    def fetch_visible_rows(self, columns):
+        """Fetch preview rows for the current search"""
+        result = self.active_search_result()
+        if result is not None:
+            return self.engine.result_rows(self.current_table, columns, result)
+        if self.search_text:
+            return self.engine.search_rows(self.current_table, columns, self.key_columns, self.search_text)
+        return self.engine.load_rows(self.current_table, columns, self.key_columns)
+
+    def export_filter(self):
+        """Return the row filter of the current search for exports, or None to export the whole table"""
+        if not self.search_text:
+            return None
+        result = self.active_search_result()
+        if result is not None:
+            return self.engine.result_filter(result)
+        return self.engine.search_filter(list(self.tree["columns"]), self.search_text)
+
+    def export_scope(self):
+        """Describe what an export contains, for status and success messages"""
+        if self.search_text:
+            return f"records matching '{self.search_text}'"
+        return "all records"
+
     def clear_search(self):
         self.entry_search.delete(0, tk.END)
         self.load_table()
@@ -367,10 +1270,7 @@ class SQLiteViewer:
 
         if values:
             try:
-                placeholders = ", ".join("?" * len(cols))
-                query = f"INSERT INTO {self.current_table} VALUES ({placeholders})"
-                self.cursor.execute(query, values)
-                self.conn.commit()
+                self.engine.insert_record(self.current_table, values)
                 self.load_table()
                 self.status_bar.config(text="Record added successfully")
             except Exception as e:
@@ -383,33 +1283,24 @@ class SQLiteViewer:
             return
 
         cols = self.tree["columns"]
-        old_values = self.tree.item(selected[0])["values"]
-        new_values = self.get_user_input(cols, "Edit Record", old_values)
+        old_values = self.fetch_full_row(selected[0])
+        if old_values is None:
+            messagebox.showerror("Error", "Failed to load the full record, refresh the table and try again")
+            return
+
+        # BLOBs and long text are shown as previews, NULLs as empty fields;
+        # both are kept unless the user changes the field
+        is_preview = [isinstance(v, bytes) or (isinstance(v, str) and len(v) > CELL_PREVIEW_LIMIT)
+                      for v in old_values]
+        shown_values = ["" if v is None else format_cell_preview(v) if preview else v
+                        for v, preview in zip(old_values, is_preview)]
+        new_values = self.get_user_input(cols, "Edit Record", shown_values)
 
         if new_values:
+            new_values = [old if (preview or old is None) and new == shown else new
+                          for old, shown, new, preview in zip(old_values, shown_values, new_values, is_preview)]
             try:
-                # Find primary key
-                self.cursor.execute(f"PRAGMA table_info({self.current_table})")
-                table_info = self.cursor.fetchall()
-                pk_column = None
-                for col in table_info:
-                    if col[5]:  # Fifth element shows if column is PK
-                        pk_column = col[1]
-                        break
-
-                if pk_column:
-                    pk_index = [col[1] for col in table_info].index(pk_column)
-                    set_clause = ", ".join(f"{col} = ?" for col in cols)
-                    query = f"UPDATE {self.current_table} SET {set_clause} WHERE {pk_column} = ?"
-                    self.cursor.execute(query, new_values + [old_values[pk_index]])
-                else:
-                    # If no PK, use all values for WHERE
-                    set_clause = ", ".join(f"{col} = ?" for col in cols)
-                    where_clause = " AND ".join(f"{col} = ?" for col in cols)
-                    query = f"UPDATE {self.current_table} SET {set_clause} WHERE {where_clause}"
-                    self.cursor.execute(query, new_values + old_values)
-
-                self.conn.commit()
+                self.engine.update_record(self.current_table, cols, old_values, new_values)
                 self.load_table()
                 self.status_bar.config(text="Record updated successfully")
             except Exception as e:
@@ -426,28 +1317,12 @@ class SQLiteViewer:
                                       icon='warning')
         if confirm:
             try:
-                old_values = self.tree.item(selected[0])["values"]
-
-                # Find primary key for deletion
-                self.cursor.execute(f"PRAGMA table_info({self.current_table})")
-                table_info = self.cursor.fetchall()
-                pk_column = None
-                for col in table_info:
-                    if col[5]:
-                        pk_column = col[1]
-                        break
-
-                if pk_column:
-                    pk_index = [col[1] for col in table_info].index(pk_column)
-                    query = f"DELETE FROM {self.current_table} WHERE {pk_column} = ?"
-                    self.cursor.execute(query, (old_values[pk_index],))
-                else:
-                    # If no PK, use all values for WHERE
-                    where_clause = " AND ".join(f"{col} = ?" for col in self.tree["columns"])
-                    query = f"DELETE FROM {self.current_table} WHERE {where_clause}"
-                    self.cursor.execute(query, old_values)
+                old_values = self.fetch_full_row(selected[0])
+                if old_values is None:
+                    messagebox.showerror("Error", "Failed to load the full record, refresh the table and try again")
+                    return
 
-                self.conn.commit()
+                self.engine.delete_record(self.current_table, self.tree["columns"], old_values)
                 self.load_table()
                 self.status_bar.config(text="Record deleted successfully")
             except Exception as e:
@@ -459,23 +1334,7 @@ class SQLiteViewer:
             return
 
         try:
-            self.cursor.execute(f"PRAGMA table_info({self.current_table})")
-            columns_info = self.cursor.fetchall()
-
-            self.cursor.execute(f"SELECT COUNT(*) FROM {self.current_table}")
-            row_count = self.cursor.fetchone()[0]
-
-            info_text = f"Table: {self.current_table}\n"
-            info_text += f"Record count: {row_count}\n\n"
-            info_text += "Table structure:\n"
-            info_text += "-" * 50 + "\n"
-
-            for col in columns_info:
-                col_name = col[1]
-                col_type = col[2]
-                not_null = "NOT NULL" if col[3] else "NULL"
-                pk = "PRIMARY KEY" if col[5] else ""
-                info_text += f"{col_name}: {col_type} {not_null} {pk}\n"
+            info_text = self.engine.describe_table(self.current_table)
 
             messagebox.showinfo("Table Information", info_text)
             self.status_bar.config(text=f"Table information: '{self.current_table}'")
@@ -483,6 +1342,288 @@ class SQLiteViewer:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to get table information:\n{e}")
 
+    def show_maintenance_panel(self):
+        """Open the database maintenance console"""
+        if not self.db_path:
+            messagebox.showwarning("Warning", "Open a database first")
+            return
+
+        if self.maintenance_win is not None and self.maintenance_win.winfo_exists():
+            self.maintenance_win.lift()
+            return
+
+        win = tk.Toplevel(self.root)
+        win.title(f"Maintenance - {self.db_name}")
+        win.geometry("650x520")
+        win.configure(bg="#f0f2f5")
+        win.transient(self.root)
+        win.protocol("WM_DELETE_WINDOW", self.close_maintenance_panel)
+        self.maintenance_win = win
+
+        container = ttk.Frame(win, style="Card.TFrame")
+        container.pack(fill="both", expand=True, padx=20, pady=20)
+
+        ttk.Label(container,
+                  text="Database Maintenance",
+                  style="Title.TLabel",
+                  font=("Segoe UI", 12, "bold")).pack(pady=10)
+
+        btn_frame = ttk.Frame(container)
+        btn_frame.pack(pady=5)
+
+        operations = [
+            ("📈 Analyze", lambda: self.start_maintenance('optimize'), "Info.TButton"),
+            ("🗜 Vacuum Into...", self.vacuum_into, "Primary.TButton"),
+            ("📝 WAL Checkpoint", lambda: self.start_maintenance('checkpoint'), "Secondary.TButton"),
+            ("✅ Integrity Check", lambda: self.start_maintenance('integrity'), "Success.TButton"),
+        ]
+
+        self.maintenance_buttons = []
+        for text, command, style in operations:
+            btn = ttk.Button(btn_frame, text=text, command=command, style=style)
+            btn.pack(side="left", padx=5)
+            self.maintenance_buttons.append(btn)
+
+        self.maintenance_progress = ttk.Progressbar(container, mode="indeterminate")
+        self.maintenance_progress.pack(fill="x", padx=10, pady=10)
+
+        self.maintenance_status = ttk.Label(container, text="Idle", style="Label.TLabel")
+        self.maintenance_status.pack(anchor="w", padx=10)
+
+        self.maintenance_text = tk.Text(container, wrap="word", font=("Consolas", 9), height=14)
+        self.maintenance_text.pack(fill="both", expand=True, padx=10, pady=5)
+
+        bottom_frame = ttk.Frame(container)
+        bottom_frame.pack(pady=10)
+
+        self.maintenance_cancel = ttk.Button(bottom_frame,
+                                             text="⛔ Cancel",
+                                             command=self.cancel_maintenance,
+                                             style="Warning.TButton",
+                                             state="disabled")
+        self.maintenance_cancel.pack(side="left", padx=5)
+
+        ttk.Button(bottom_frame,
+                   text="❌ Close",
+                   command=self.close_maintenance_panel,
+                   style="Danger.TButton").pack(side="left", padx=5)
+
+        # Show the current figures right away
+        self.start_maintenance('stats')
+
+    def vacuum_into(self):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        name, extension = os.path.splitext(self.db_name)
+        file_path = filedialog.asksaveasfilename(
+            title="Vacuum Into",
+            defaultextension=extension or ".db",
+            initialfile=f"{name}_compacted_{timestamp}{extension}",
+            filetypes=[("SQLite Database", "*.sqlite *.db *.sqlite3"), ("All files", "*.*")]
+        )
+        if not file_path:
+            return
+
+        if os.path.abspath(file_path) == os.path.abspath(self.db_path):
+            messagebox.showwarning("Warning", "Choose a file other than the open database")
+            return
+
+        if os.path.exists(file_path):
+            # VACUUM INTO refuses to overwrite an existing file
+            os.remove(file_path)
+
+        self.start_maintenance('vacuum_into', file_path)
+
+    def start_maintenance(self, operation, target_path=None):
+        if self.maintenance_job is not None and not self.maintenance_job.done:
+            return
+
+        self.maintenance_job = MaintenanceJob(self.db_path, operation, target_path)
+        self.maintenance_job.start()
+
+        for btn in self.maintenance_buttons:
+            btn.config(state="disabled")
+        self.maintenance_cancel.config(state="normal")
+        if operation == 'vacuum_into':
+            self.maintenance_progress.config(mode="determinate", maximum=100, value=0)
+        else:
+            self.maintenance_progress.config(mode="indeterminate")
+            self.maintenance_progress.start(10)
+
+        self.poll_maintenance()
+
+    def poll_maintenance(self):
+        """Update the panel from the background job until it finishes"""
+        job = self.maintenance_job
+        if self.maintenance_win is None or not self.maintenance_win.winfo_exists():
+            return
+
+        label = MAINTENANCE_OPERATIONS[job.operation]
+        if not job.done:
+            status = f"{label}... {job.elapsed():.1f} s, ~{job.steps} VM steps"
+            # The copy's size against the source is a good estimate of VACUUM INTO progress
+            if job.operation == 'vacuum_into' and job.before and os.path.exists(job.target_path):
+                percent = min(os.path.getsize(job.target_path) / max(job.before['file_size'], 1) * 100, 100)
+                self.maintenance_progress.config(value=percent)
+                status += f", {percent:.0f}%"
+            self.maintenance_status.config(text=status)
+            self.maintenance_win.after(100, self.poll_maintenance)
+            return
+
+        self.maintenance_progress.stop()
+        self.maintenance_progress.config(mode="determinate", value=0 if job.error else 100)
+        for btn in self.maintenance_buttons:
+            btn.config(state="normal")
+        self.maintenance_cancel.config(state="disabled")
+
+        if job.error:
+            self.maintenance_status.config(text=f"{label} failed: {job.error}")
+        else:
+            self.maintenance_status.config(text=f"{label} finished in {job.elapsed():.1f} s")
+
+        self.maintenance_text.config(state="normal")
+        self.maintenance_text.delete("1.0", "end")
+        self.maintenance_text.insert("end", self.format_maintenance_report(job))
+        self.maintenance_text.config(state="disabled")
+
+        if not job.error and job.operation != 'stats':
+            self.status_bar.config(text=f"Maintenance: {label} finished")
+
+    def format_maintenance_report(self, job):
+        def describe(stats):
+            if stats is None:
+                return "  not available\n"
+            unused = (f"{stats['unused_percent']:.1f}%" if stats['unused_percent'] is not None
+                      else "n/a (dbstat not available)")
+            return (f"  File size:      {format_size(stats['file_size'])}\n"
+                    f"  WAL size:       {format_size(stats['wal_size'])}\n"
+                    f"  Pages:          {stats['page_count']} x {stats['page_size']} B\n"
+                    f"  Free-list:      {stats['freelist_count']} pages ({stats['free_percent']:.1f}%)\n"
+                    f"  Unused in pages: {unused}\n")
+
+        report = ""
+        if job.result:
+            report += f"{job.result}\n\n"
+        if job.error:
+            report += f"Error: {job.error}\n\n"
+
+        if job.operation == 'stats':
+            report += "Current:\n" + describe(job.before)
+        else:
+            report += "Before:\n" + describe(job.before)
+            after_label = "After (new file)" if job.operation == 'vacuum_into' else "After"
+            report += f"\n{after_label}:\n" + describe(job.after)
+        return report
+
+    def cancel_maintenance(self):
+        if self.maintenance_job is not None and not self.maintenance_job.done:
+            self.maintenance_job.cancel()
+            self.maintenance_status.config(text="Cancelling...")
+
+    def close_maintenance_panel(self):
+        if self.maintenance_job is not None and not self.maintenance_job.done:
+            self.maintenance_job.cancel()
+        self.maintenance_win.destroy()
+
+    def check_frame_stall(self):
+        """Record how late the heartbeat fired, i.e. how long the UI was blocked"""
+        now = time.perf_counter()
+        self.profiler.add_stall(now - self.last_tick - STALL_CHECK_MS / 1000)
+        self.last_tick = now
+        self.root.after(STALL_CHECK_MS, self.check_frame_stall)
+
+    def show_performance_hud(self):
+        """Open a window with live query and UI timings"""
+        if self.hud is not None and self.hud.winfo_exists():
+            self.hud.lift()
+            return
+
+        self.hud = tk.Toplevel(self.root)
+        self.hud.title("Performance")
+        self.hud.geometry("650x450")
+        self.hud.configure(bg="#f0f2f5")
+        self.hud.transient(self.root)
+
+        container = ttk.Frame(self.hud, style="Card.TFrame")
+        container.pack(fill="both", expand=True, padx=20, pady=20)
+
+        self.hud_text = tk.Text(container, wrap="none", font=("Consolas", 9), height=20)
+        self.hud_text.pack(fill="both", expand=True, padx=10, pady=5)
+
+        btn_frame = ttk.Frame(container)
+        btn_frame.pack(pady=10)
+
+        ttk.Button(btn_frame,
+                   text="💾 Save Trace",
+                   command=self.save_profile_trace,
+                   style="Success.TButton").pack(side="left", padx=5)
+
+        ttk.Button(btn_frame,
+                   text="🗑 Reset",
+                   command=self.profiler.reset,
+                   style="Tertiary.TButton").pack(side="left", padx=5)
+
+        ttk.Button(btn_frame,
+                   text="❌ Close",
+                   command=self.hud.destroy,
+                   style="Danger.TButton").pack(side="left", padx=5)
+
+        self.refresh_hud()
+
+    def refresh_hud(self):
+        if self.hud is None or not self.hud.winfo_exists():
+            return
+
+        def describe(record):
+            return (f"{QueryProfiler.total_time(record) * 1000:8.2f} ms  "
+                    f"exec {record['execute'] * 1000:.2f}  fetch {record['fetch'] * 1000:.2f}  "
+                    f"insert {record['insert'] * 1000:.2f}  rows {record['rows']}  "
+                    f"{format_size(record['bytes']) + '  ' if record['bytes'] else ''}"
+                    f"binds {record['binds']}  steps ~{record['vm_steps']}\n"
+                    f"             {record['sql'][:100]}\n")
+
+        text = (f"Statements traced: {self.profiler.statements}   "
+                f"VM steps: ~{self.profiler.vm_steps}\n\n")
+
+        text += "Last query:\n"
+        last = self.profiler.last_query()
+        text += describe(last) if last else "  none\n"
+
+        text += "\nSlowest queries:\n"
+        for record in self.profiler.slowest():
+            text += describe(record)
+
+        stalls = list(self.profiler.stalls)
+        text += f"\nUI frame stalls (>{self.profiler.stall_threshold * 1000:.0f} ms): {len(stalls)}"
+        if stalls:
+            text += f", worst {max(s['duration'] for s in stalls) * 1000:.0f} ms\n"
+            for stall in stalls[-5:]:
+                text += f"  {stall['duration'] * 1000:8.0f} ms\n"
+
+        self.hud_text.config(state="normal")
+        self.hud_text.delete("1.0", "end")
+        self.hud_text.insert("end", text)
+        self.hud_text.config(state="disabled")
+
+        self.hud.after(500, self.refresh_hud)
+
+    def save_profile_trace(self):
+        """Dump the collected timings to a trace file"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        file_path = filedialog.asksaveasfilename(
+            title="Save Profile Trace",
+            defaultextension=".json",
+            initialfile=f"profile_{timestamp}.json",
+            filetypes=[("Trace files", "*.json"), ("All files", "*.*")]
+        )
+        if not file_path:
+            return
+
+        try:
+            self.profiler.dump_trace(file_path)
+            self.status_bar.config(text=f"Profile trace saved: {os.path.basename(file_path)}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save profile trace:\n{e}")
+
     def export_data_menu(self):
         """Show export options menu"""
         if not self.current_table:
@@ -514,17 +1655,6 @@ class SQLiteViewer:
             return
 
         try:
-            # Get data from database
-            self.cursor.execute(f"SELECT * FROM {self.current_table}")
-            data = self.cursor.fetchall()
-
-            # Get column names
-            self.cursor.execute(f"PRAGMA table_info({self.current_table})")
-            columns = [col[1] for col in self.cursor.fetchall()]
-
-            # Create DataFrame
-            df = pd.DataFrame(data, columns=columns)
-
             # Ask for save location
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             default_filename = f"{self.current_table}_{timestamp}.xlsx"
@@ -541,30 +1671,16 @@ class SQLiteViewer:
             )
 
             if file_path:
-                # Export to Excel with formatting
-                with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                    df.to_excel(writer, sheet_name=self.current_table, index=False)
-
-                    # Auto-adjust column widths
-                    worksheet = writer.sheets[self.current_table]
-                    for column in worksheet.columns:
-                        max_length = 0
-                        column_letter = column[0].column_letter
-                        for cell in column:
-                            try:
-                                if len(str(cell.value)) > max_length:
-                                    max_length = len(str(cell.value))
-                            except:
-                                pass
-                        adjusted_width = min(max_length + 2, 50)
-                        worksheet.column_dimensions[column_letter].width = adjusted_width
-
-                self.status_bar.config(text=f"Data exported to Excel: {os.path.basename(file_path)}")
+                record_count = self.engine.export_to_excel(self.current_table, file_path,
+                                                           self.export_filter())
+
+                self.status_bar.config(text=f"Data exported to Excel: {os.path.basename(file_path)} "
+                                            f"({record_count} {self.export_scope()})")
                 messagebox.showinfo("Export Successful",
                                     f"Data successfully exported to Excel!\n\n"
                                     f"File: {os.path.basename(file_path)}\n"
                                     f"Path: {file_path}\n"
-                                    f"Records: {len(data)}")
+                                    f"Records: {record_count} ({self.export_scope()})")
 
         except ImportError:
             messagebox.showerror("Export Error",
@@ -614,60 +1730,10 @@ class SQLiteViewer:
 
         if file_path:
             try:
-                self.cursor.execute(f"SELECT * FROM {self.current_table}")
-                rows = self.cursor.fetchall()
-
-                # Get column names
-                cols = self.tree["columns"]
-
-                if filetype == 'csv':
-                    # Export to CSV
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        # Write headers
-                        f.write(','.join(cols) + '\n')
-                        # Write data
-                        for row in rows:
-                            f.write(','.join(str(value).replace(',', ';') for value in row) + '\n')
-
-                elif filetype == 'txt':
-                    # Export to text with formatting
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write(f"Table: {self.current_table}\n")
-                        f.write(f"Export date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                        f.write(f"Record count: {len(rows)}\n")
-                        f.write("=" * 80 + "\n\n")
-
-                        # Write headers
-                        header = " | ".join(cols)
-                        f.write(header + "\n")
-                        f.write("-" * len(header) + "\n")
-
-                        # Write data
-                        for row in rows:
-                            line = " | ".join(str(value) for value in row)
-                            f.write(line + "\n")
-
-                elif filetype == 'sql':
-                    # Export as SQL INSERT statements
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write(f"-- SQL Export for table: {self.current_table}\n")
-                        f.write(f"-- Export date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                        f.write(f"-- Record count: {len(rows)}\n\n")
-
-                        for row in rows:
-                            values = []
-                            for value in row:
-                                if value is None:
-                                    values.append("NULL")
-                                elif isinstance(value, (int, float)):
-                                    values.append(str(value))
-                                else:
-                                    # ИСПРАВЛЕННАЯ СТРОКА - используем переменную для экранирования
-                                    escaped_value = str(value).replace("'", "''")
-                                    values.append(f"'{escaped_value}'")
-
-                            insert_stmt = f"INSERT INTO {self.current_table} VALUES ({', '.join(values)});\n"
-                            f.write(insert_stmt)
+                record_count = self.engine.export_data(self.current_table, filetype, file_path,
+                                                       self.export_filter())
+                self.status_bar.config(text=f"Data exported to {filetype.upper()}: {os.path.basename(file_path)} "
+                                            f"({record_count} {self.export_scope()})")
 
             except Exception as e:
                 messagebox.showerror("Export Error", f"Failed to export data:\n{e}")
@@ -0,0 +1,337 @@
+"""Benchmark suite for SQLite Viewer.
+
+Generates synthetic SQLite databases and times the engine paths behind the
+viewer's buttons (load, search, edit, delete, table info and every exporter).
+Results are written as JSON and can be compared against an earlier run:
+
+    python benchmark.py --rows 1000 100000 --output results.json
+    python benchmark.py --rows 1000 100000 --compare results.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from app import DatabaseEngine, format_preview_row
+
+TABLE_NAME = "bench"
+SEARCH_WORD = "needle"
+WORDS = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel", SEARCH_WORD]
+EXPORT_FORMATS = ["csv", "txt", "sql", "excel"]
+
+
+def generate_database(path, rows, columns, blob_ratio, blob_size, with_pk, seed=0):
+    """Create a synthetic database with a single table and return its column names"""
+    rng = random.Random(seed)
+
+    # First column is the id, the last one holds BLOBs, the rest cycle through types
+    col_defs = ["id INTEGER PRIMARY KEY" if with_pk else "id INTEGER"]
+    types = ["TEXT", "INTEGER", "REAL"]
+    for i in range(max(columns - 2, 0)):
+        col_defs.append(f"c{i} {types[i % len(types)]}")
+    if columns > 1:
+        col_defs.append("payload BLOB")
+    col_names = [d.split()[0] for d in col_defs]
+
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE {TABLE_NAME} ({', '.join(col_defs)})")
+
+    def make_row(row_id):
+        row = [row_id]
+        for i in range(max(columns - 2, 0)):
+            kind = types[i % len(types)]
+            if kind == "TEXT":
+                row.append(f"{rng.choice(WORDS)} {rng.randint(0, 10 ** 6)}")
+            elif kind == "INTEGER":
+                row.append(rng.randint(-10 ** 9, 10 ** 9))
+            else:
+                row.append(rng.random() * 1000)
+        if columns > 1:
+            row.append(rng.randbytes(blob_size) if rng.random() < blob_ratio else None)
+        return row
+
+    placeholders = ", ".join("?" * len(col_names))
+    conn.executemany(f"INSERT INTO {TABLE_NAME} VALUES ({placeholders})",
+                     (make_row(i + 1) for i in range(rows)))
+    conn.commit()
+    conn.close()
+    return col_names
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KB, or None if unknown.
+
+    This is a high-water mark for the whole process, which is why every
+    scenario runs in a fresh process.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, rows_per_call, peak_alloc_kb):
+    """Turn a list of latencies (seconds) into the reported statistics"""
+    if not latencies:
+        return {"samples": 0}
+    ordered = sorted(latencies)
+    mean = sum(ordered) / len(ordered)
+    return {
+        "samples": len(ordered),
+        "mean_ms": mean * 1000,
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p90_ms": percentile(ordered, 90) * 1000,
+        "p95_ms": percentile(ordered, 95) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+        "max_ms": ordered[-1] * 1000,
+        "rows_per_sec": rows_per_call / mean if mean > 0 else None,
+        "peak_alloc_kb": peak_alloc_kb,
+    }
+
+
+def measure(func, count, rows_per_call, setup=None):
+    """Time count calls of func and measure its peak Python allocation.
+
+    The memory figure comes from one extra, untimed call under tracemalloc,
+    which would otherwise slow down the timed calls. setup, if given, runs
+    untimed before every call.
+    """
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    latencies = []
+    for _ in range(count):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies, rows_per_call, peak // 1024)
+
+
+def run_scenario(workdir, rows, columns, blob_ratio, blob_size, with_pk, repeat, samples, seed):
+    """Generate one database and time every engine path against it.
+
+    Returns the per-operation results and the peak RSS of the process, so it
+    should run in a process of its own.
+    """
+    db_path = os.path.join(workdir, f"bench_{rows}_{columns}_{'pk' if with_pk else 'nopk'}.db")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    generate_database(db_path, rows, columns, blob_ratio, blob_size, with_pk, seed)
+
+    engine = DatabaseEngine(sqlite3.connect(db_path))
+    rng = random.Random(seed)
+    results = {}
+
+    def load_table():
+        cols = engine.table_columns(TABLE_NAME)
+        keys = engine.row_key_columns(TABLE_NAME)
+        for row in engine.load_rows(TABLE_NAME, cols, keys):
+            format_preview_row(row[len(keys):], len(cols))
+
+    def search_records():
+        # Same path as the Search button on a rowid table
+        cols = engine.table_columns(TABLE_NAME)
+        result = engine.cached_search(TABLE_NAME, cols, SEARCH_WORD)
+        for row in engine.result_rows(TABLE_NAME, cols, result):
+            format_preview_row(row[1:], len(cols))
+
+    results["load_table"] = measure(load_table, repeat, rows)
+    # Cold: the scan and materialization of a first search; warm: a repeat served from the cache
+    results["search_records"] = measure(search_records, repeat, rows, setup=engine.result_cache.clear)
+    results["search_records_warm"] = measure(search_records, repeat, rows)
+    results["show_table_info"] = measure(lambda: engine.describe_table(TABLE_NAME), repeat, rows)
+
+    for filetype in EXPORT_FORMATS:
+        export_path = os.path.join(workdir, f"export.{'xlsx' if filetype == 'excel' else filetype}")
+        if filetype == "excel":
+            export = lambda: engine.export_to_excel(TABLE_NAME, export_path)
+        else:
+            export = lambda: engine.export_data(TABLE_NAME, filetype, export_path)
+        try:
+            results[f"export_{filetype}"] = measure(export, repeat, rows)
+        except ImportError as e:
+            results[f"export_{filetype}"] = {"skipped": str(e)}
+
+    # Point operations work on random rows, the same ones on every run. Without a
+    # primary key rows are matched on every column, and "= NULL" never matches,
+    # so only rows with a payload are usable there.
+    cols = engine.table_columns(TABLE_NAME)
+    candidates_query = f"SELECT rowid FROM {TABLE_NAME}"
+    if not with_pk and "payload" in cols:
+        candidates_query += " WHERE payload IS NOT NULL"
+    rowids = [row[0] for row in engine.conn.execute(candidates_query + " ORDER BY rowid")]
+    rng.shuffle(rowids)
+    # One extra row per operation for the untimed memory measurement
+    samples = min(samples, len(rowids) // 2 - 1)
+    edit_ids = rowids[:samples + 1]
+    delete_ids = rowids[samples + 1:(samples + 1) * 2]
+
+    def check_changed(changes_before, operation):
+        if engine.conn.total_changes == changes_before:
+            raise RuntimeError(f"{operation} did not change any row")
+
+    def edit_record():
+        old_values = engine.fetch_row(TABLE_NAME, ["rowid"], (edit_ids.pop(),))
+        new_values = list(old_values)
+        new_values[1] = f"{SEARCH_WORD} edited"
+        changes_before = engine.conn.total_changes
+        engine.update_record(TABLE_NAME, cols, old_values, new_values)
+        check_changed(changes_before, "edit_record")
+
+    def delete_record():
+        old_values = engine.fetch_row(TABLE_NAME, ["rowid"], (delete_ids.pop(),))
+        changes_before = engine.conn.total_changes
+        engine.delete_record(TABLE_NAME, cols, old_values)
+        check_changed(changes_before, "delete_record")
+
+    if samples <= 0:
+        reason = "no rows usable for matching on every column"
+        results["edit_record"] = {"skipped": reason}
+        results["delete_record"] = {"skipped": reason}
+    else:
+        if len(cols) > 1:
+            results["edit_record"] = measure(edit_record, samples, 1)
+        results["delete_record"] = measure(delete_record, samples, 1)
+
+    engine.conn.close()
+    return results, peak_rss_kb()
+
+
+def scenario_name(rows, columns, blob_ratio, blob_size, with_pk):
+    return (f"rows={rows},cols={columns},blob={blob_ratio}x{blob_size},"
+            f"{'pk' if with_pk else 'nopk'}")
+
+
+def compare(current, baseline, tolerance):
+    """Print p50 changes against a baseline run and return the regressions"""
+    old_scenarios = {s["name"]: s["results"] for s in baseline["scenarios"]}
+    regressions = []
+
+    for scenario in current["scenarios"]:
+        old_results = old_scenarios.get(scenario["name"])
+        if old_results is None:
+            print(f"{scenario['name']}: no baseline")
+            continue
+
+        for op, stats in scenario["results"].items():
+            old = old_results.get(op, {})
+            if "p50_ms" not in stats or "p50_ms" not in old:
+                continue
+            change = (stats["p50_ms"] - old["p50_ms"]) / old["p50_ms"] if old["p50_ms"] else 0.0
+            flag = ""
+            if change > tolerance:
+                flag = "  <-- REGRESSION"
+                regressions.append((scenario["name"], op, change))
+            print(f"{scenario['name']} {op}: {old['p50_ms']:.2f} ms -> {stats['p50_ms']:.2f} ms "
+                  f"({change:+.1%}){flag}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SQLite Viewer engine paths")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000],
+                        help="table sizes to generate")
+    parser.add_argument("--columns", type=int, default=8, help="number of columns")
+    parser.add_argument("--blob-ratio", type=float, default=0.1,
+                        help="fraction of rows with a BLOB payload")
+    parser.add_argument("--blob-size", type=int, default=64 * 1024, help="BLOB payload size in bytes")
+    parser.add_argument("--pk", choices=["with", "without", "both"], default="both",
+                        help="generate tables with, without or both with and without a primary key")
+    parser.add_argument("--repeat", type=int, default=5, help="runs of each table-wide operation")
+    parser.add_argument("--samples", type=int, default=50, help="runs of each edit/delete operation")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for data generation")
+    parser.add_argument("--workdir", help="directory for generated databases (default: temporary)")
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed p50 slowdown before reporting a regression")
+    args = parser.parse_args()
+
+    pk_modes = {"with": [True], "without": [False], "both": [True, False]}[args.pk]
+
+    report = {
+        "meta": {
+            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "seed": args.seed,
+        },
+        "scenarios": [],
+    }
+
+    # A fresh process per scenario keeps peak RSS from carrying over between them
+    context = multiprocessing.get_context("spawn")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        workdir = args.workdir or tmpdir
+        os.makedirs(workdir, exist_ok=True)
+
+        for rows in args.rows:
+            for with_pk in pk_modes:
+                name = scenario_name(rows, args.columns, args.blob_ratio, args.blob_size, with_pk)
+                print(f"Running {name}...", file=sys.stderr)
+                with context.Pool(1) as pool:
+                    results, peak_rss = pool.apply(run_scenario, (
+                        workdir, rows, args.columns, args.blob_ratio, args.blob_size,
+                        with_pk, args.repeat, args.samples, args.seed))
+                report["scenarios"].append({
+                    "name": name,
+                    "config": {
+                        "rows": rows,
+                        "columns": args.columns,
+                        "blob_ratio": args.blob_ratio,
+                        "blob_size": args.blob_size,
+                        "primary_key": with_pk,
+                    },
+                    "peak_rss_kb": peak_rss,
+                    "results": results,
+                })
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()